@@ -1,15 +1,40 @@
 import pdfplumber
 import pandas as pd
+import numpy as np
+import xlsxwriter
 import os
 import csv
 import sys
 import platform
 import traceback
 import re
+import queue
+import hashlib
+import json
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import freeze_support
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from threading import Thread
+from itertools import chain, repeat
+
+# PyMuPDF is an optional, opt-in table extraction backend (AGPL-licensed, and not
+# faster than pdfplumber on the statements benchmarked so far)
+try:
+    import pymupdf
+except ImportError:
+    pymupdf = None
+
+# Parquet output of the combined transactions is only written when pyarrow is installed
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+# Table extraction backends; PyMuPDF is opted into with --backend pymupdf or the GUI checkbox
+BACKENDS = ('pdfplumber', 'pymupdf')
+DEFAULT_BACKEND = 'pdfplumber'
 
 # Custom Path implementation with fallback
 try:
@@ -40,41 +65,144 @@ except ImportError:
         def __str__(self):
             return self.path
 
+# Minimum number of pages a PDF needs per extra worker before it is split across processes
+PAGES_PER_WORKER = 10
+
+# Part of every extraction cache key; bump it whenever extract_table_from_pdf or
+# extract_account_info_from_pdf change what they return, so stale entries are ignored
+CACHE_VERSION = 2
+
+# Above this many combined transactions the Excel workbook is skipped (it is by far the
+# slowest output to write); the CSV, and Parquet if available, still hold every row
+EXCEL_MAX_ROWS = 50_000
+
+# Patterns used when cleaning extracted cells, compiled once at import
+_NEWLINE_RE = re.compile(r'\n')
+
+# Patterns for statement filenames like 'Transactions--601730-01606158--16-12-2023-10-12-2024.pdf'
+_ACCOUNT_RE = re.compile(r'--(\d+)-(\d+)--')
+_DATE_RANGE_RE = re.compile(r'--(\d{2})-(\d{2})-(\d{4})-(\d{2})-(\d{2})-(\d{4})\.pdf$')
+
+# Patterns for the account details in a statement's first-page header
+_ACCOUNT_TYPE_RE = re.compile(r'Account type:\s*(.+?)(?:\n|Transactions)')
+_ACCOUNT_NUMBER_RE = re.compile(r'(?:Transactions\s+)?Account number:\s*(\d+)')
+_SORT_CODE_RE = re.compile(r'Sort code:\s*(\d+)')
+_ACCOUNT_NAME_RE = re.compile(r'Account name:\s*(.+?)(?:\n|Your)')
+
+
+def _parse_amount(cell):
+    """Parse a currency cell like '£1,234.56'; blank cells count as 0, unparseable ones as NaN"""
+    if not isinstance(cell, str):
+        return 0.0 if pd.isna(cell) else float(cell)
+    if cell in ('', 'nan'):
+        return 0.0
+    try:
+        # 'Â' shows up when a UTF-8 '£' has been decoded as Latin-1
+        return float(cell.replace('£', '').replace('Â', '').replace(',', ''))
+    except ValueError:
+        return np.nan
+
+
+def _parse_currency(values):
+    """Parse an array of currency cells straight into a float64 array in a single pass"""
+    return np.fromiter(map(_parse_amount, values), dtype=np.float64, count=len(values))
+
+
+def _count_pages(pdf_path, backend=DEFAULT_BACKEND):
+    if backend == 'pymupdf':
+        with pymupdf.open(str(pdf_path)) as doc:
+            return doc.page_count
+    with pdfplumber.open(str(pdf_path)) as pdf:
+        return len(pdf.pages)
+
+
+def _extract_page_tables(pdf_path, page_numbers=None, backend=DEFAULT_BACKEND):
+    """Return the table of each page in page_numbers (1-based, all pages if None), in page order.
+
+    Only the requested pages are parsed, so a worker handles just its own slice of
+    the document.
+    """
+    if backend == 'pymupdf':
+        tables = []
+        with pymupdf.open(str(pdf_path)) as doc:
+            for page_number in page_numbers or range(1, doc.page_count + 1):
+                found = doc[page_number - 1].find_tables().tables
+                # Like pdfplumber's extract_table, keep only the largest table on the page
+                tables.append(max(found, key=lambda t: len(t.cells)).extract() if found else None)
+        return tables
+
+    tables = []
+    with pdfplumber.open(str(pdf_path), pages=page_numbers) as pdf:  # Convert Path to string
+        for page in pdf.pages:
+            tables.append(page.extract_table())
+            # Drop the page's cached layout objects so memory stays flat on long statements
+            page.close()
+    return tables
+
+
 # CLI version of processor that doesn't require Tkinter
 class CLIProcessor:
-    def __init__(self, input_folder=None, output_folder=None):
+    def __init__(self, input_folder=None, output_folder=None, page_workers=1, save_individual=True,
+                 backend=DEFAULT_BACKEND, use_cache=True):
         self.input_folder = input_folder
         self.output_folder = output_folder
+        # Reuse extracted tables from <output_folder>/.cache for PDFs seen before
+        self.use_cache = use_cache
+        # Table extraction backend ('pymupdf' or 'pdfplumber')
+        self.backend = backend
+        # Write a CSV per PDF in addition to the combined outputs
+        self.save_individual = save_individual
+        # Processes available for splitting a single PDF by page range
+        self.page_workers = page_workers
     
     def log_message(self, message):
         print(message)
     
+    def extract_page_tables(self, pdf_path, backend):
+        """Extract every page's table with the given backend, in page order"""
+        # Without spare workers there is nothing to split, so skip opening the PDF to count pages
+        if self.page_workers <= 1:
+            return _extract_page_tables(pdf_path, backend=backend)
+
+        page_count = _count_pages(pdf_path, backend)
+
+        # Long PDFs are split into contiguous page ranges parsed in parallel
+        workers = min(self.page_workers, page_count // PAGES_PER_WORKER)
+        if workers > 1:
+            size = -(-page_count // workers)
+            page_slices = [list(range(start + 1, min(start + size, page_count) + 1))
+                           for start in range(0, page_count, size)]
+            with ProcessPoolExecutor(max_workers=len(page_slices)) as executor:
+                return list(chain.from_iterable(executor.map(_extract_page_tables, repeat(pdf_path),
+                                                             page_slices, repeat(backend))))
+        return _extract_page_tables(pdf_path, backend=backend)
+
     def extract_table_from_pdf(self, pdf_path):
-        all_data = []
+        name = Path(pdf_path).name
         try:
-            with pdfplumber.open(str(pdf_path)) as pdf:  # Convert Path to string
-                for page in pdf.pages:
-                    table = page.extract_table()
-                    if table:
-                        if table[0][0] == 'Date':
-                            if not all_data:
-                                all_data.extend(table)  # Include header row for first table
-                            else:
-                                all_data.extend(table[1:])  # Skip header for subsequent tables
-                        else:
-                            all_data.extend(table)
+            tables = self.extract_page_tables(pdf_path, self.backend)
+            # Pages without a table come back as None and are skipped
+            all_data = list(chain.from_iterable(filter(None, tables)))
+
+            # PyMuPDF can miss tables in some layouts; give pdfplumber a try before giving up
+            if not all_data and self.backend == 'pymupdf':
+                self.log_message(f"No table found by PyMuPDF in {name}, retrying with pdfplumber")
+                tables = self.extract_page_tables(pdf_path, 'pdfplumber')
+                all_data = list(chain.from_iterable(filter(None, tables)))
             
             # Ensure we have headers if data exists
             if all_data and all_data[0][0] == 'Date':
-                headers = all_data.pop(0)  # Remove header row
-                self.log_message(f"Extracted {len(all_data)} rows from {Path(pdf_path).name}")
-                return headers, all_data
+                headers = all_data[0]
             elif all_data:
-                self.log_message(f"Extracted {len(all_data)} rows from {Path(pdf_path).name}")
-                return ["Date", "Type", "Description", "Paid in", "Paid out", "Balance"], all_data
+                headers = ["Date", "Type", "Description", "Paid in", "Paid out", "Balance"]
             else:
-                self.log_message(f"No data found in {Path(pdf_path).name}")
+                self.log_message(f"No data found in {name}")
                 return None, []
+
+            # Drop the header rows, including the copy repeated at the top of each page
+            all_data = [row for row in all_data if row[0] != 'Date']
+            self.log_message(f"Extracted {len(all_data)} rows from {name}")
+            return headers, all_data
         except Exception as e:
             self.log_message(f"Error processing {pdf_path}: {str(e)}")
             return None, []
@@ -83,7 +211,7 @@ class CLIProcessor:
         """Extract account number from filename pattern like 'Transactions--601730-01606158--16-12-2023-10-12-2024.pdf'"""
         try:
             # Look for pattern like 601730-01606158
-            match = re.search(r'--(\d+)-(\d+)--', filename)
+            match = _ACCOUNT_RE.search(filename)
             if match:
                 sort_code = match.group(1)
                 account_number = match.group(2)
@@ -99,7 +227,7 @@ class CLIProcessor:
         """
         try:
             # Pattern: --DD-MM-YYYY-DD-MM-YYYY.pdf at the end
-            match = re.search(r'--(\d{2})-(\d{2})-(\d{4})-(\d{2})-(\d{2})-(\d{4})\.pdf$', filename)
+            match = _DATE_RANGE_RE.search(filename)
             if match:
                 start_day, start_month, start_year = match.group(1), match.group(2), match.group(3)
                 end_day, end_month, end_year = match.group(4), match.group(5), match.group(6)
@@ -118,19 +246,19 @@ class CLIProcessor:
                 text = page.extract_text()
 
                 # Extract account type (e.g., "Select Account")
-                account_type_match = re.search(r'Account type:\s*(.+?)(?:\n|Transactions)', text)
+                account_type_match = _ACCOUNT_TYPE_RE.search(text)
                 account_type = account_type_match.group(1).strip() if account_type_match else "Unknown"
 
                 # Extract account number (e.g., "01606123")
-                account_number_match = re.search(r'(?:Transactions\s+)?Account number:\s*(\d+)', text)
+                account_number_match = _ACCOUNT_NUMBER_RE.search(text)
                 account_number = account_number_match.group(1).strip() if account_number_match else "Unknown"
 
                 # Extract sort code (e.g., "601730")
-                sort_code_match = re.search(r'Sort code:\s*(\d+)', text)
+                sort_code_match = _SORT_CODE_RE.search(text)
                 sort_code = sort_code_match.group(1).strip() if sort_code_match else "Unknown"
 
                 # Extract account name (e.g., "KIRKHAM M/TPM")
-                account_name_match = re.search(r'Account name:\s*(.+?)(?:\n|Your)', text)
+                account_name_match = _ACCOUNT_NAME_RE.search(text)
                 account_name = account_name_match.group(1).strip() if account_name_match else "Unknown"
 
                 return {
@@ -154,40 +282,98 @@ class CLIProcessor:
                 'accountname_accounttype': 'Unknown-Unknown'
             }
     
-    def parse_description(self, row):
-        """Parse the description field for DPC and POS transactions"""
-        desc_type = row.get('Type', '')
-        description = row.get('Description', '')
-        
-        # Initialize all parsed fields as empty
-        parsed = {
-            'DPC1': '', 'DPC2': '', 'DPC3': '', 'DPC4': '', 'DPC5': '',
-            'POS1': '', 'POS2': '', 'POS3': '', 'POS4': ''
-        }
-        
-        if desc_type == 'DPC' and description:
-            # DPC format typically has 5 parts separated by commas
-            parts = [part.strip() for part in description.split(',')]
-            for i, part in enumerate(parts[:5]):
-                parsed[f'DPC{i+1}'] = part
-                
-        elif desc_type == 'POS' and description:
-            # POS format typically has 4 parts separated by commas
-            parts = [part.strip() for part in description.split(',')]
-            for i, part in enumerate(parts[:4]):
-                parsed[f'POS{i+1}'] = part
-                
+    def parse_descriptions(self, df):
+        """Split DPC and POS descriptions into their comma-separated parts.
+
+        Returns a frame of DPC1-DPC5 and POS1-POS4 columns aligned with df; rows of
+        other types (and parts beyond the fifth/fourth) are left empty.
+        """
+        parsed = pd.DataFrame('', index=df.index, columns=[
+            'DPC1', 'DPC2', 'DPC3', 'DPC4', 'DPC5',
+            'POS1', 'POS2', 'POS3', 'POS4'
+        ])
+
+        # DPC format typically has 5 parts and POS 4, separated by commas
+        for desc_type, part_count in (('DPC', 5), ('POS', 4)):
+            is_type = df['Type'] == desc_type
+            if not is_type.any():
+                continue
+            # Description is categorical, so .str splits each distinct description only once
+            parts = df.loc[is_type, 'Description'].str.split(',', expand=True)
+            for i in range(min(part_count, parts.shape[1])):
+                parsed.loc[is_type, f'{desc_type}{i+1}'] = parts[i].fillna('').str.strip()
+
         return parsed
 
+    def process_dataframe(self, df):
+        """Clean raw table rows: numeric amounts, parsed dates and single-line descriptions"""
+        # Basic data cleaning
+        df = df.dropna(how='all')
+
+        # Clean numeric values for display, parsing all three amount columns in one pass
+        amount_cols = ['Balance', 'Paid in', 'Paid out']
+        amounts = _parse_currency(df[amount_cols].to_numpy(dtype=object).ravel())
+        df[amount_cols] = amounts.reshape(len(df), len(amount_cols))
+
+        # Process dates: statements repeat the same dates many times, so parse each
+        # distinct string once and map the results back onto the column
+        codes, unique_dates = pd.factorize(df['Date'])
+        if len(unique_dates):
+            parsed_dates = pd.to_datetime(unique_dates, format='%d %b %Y', errors='coerce')
+            # Missing dates get code -1, which must become NaT rather than wrap to the last date
+            df['Date'] = parsed_dates.take(codes, allow_fill=True, fill_value=pd.NaT)
+        else:
+            df['Date'] = pd.NaT
+        df['Description'] = df['Description'].astype(str).str.replace(_NEWLINE_RE, ' ', regex=True).str.strip()
+        df = df.dropna(subset=['Date'])
+        # Descriptions and types repeat heavily across statements; store each distinct string once
+        df['Description'] = df['Description'].astype('category')
+        df['Type'] = df['Type'].astype('category')
+        return df
+
     def save_dataframe(self, df, filepath):
-        df.to_csv(str(filepath),  # Convert Path to string
-                  index=False,
-                  quoting=csv.QUOTE_NONNUMERIC,
-                  quotechar='"',
-                  doublequote=True,
-                  date_format='%Y-%m-%d',
-                  float_format='%.2f')
+        # Format dates and amounts a whole column at a time, so writing is a single
+        # pass over plain row tuples into a large-buffered csv.writer
+        columns = []
+        for _, col in df.items():
+            if pd.api.types.is_datetime64_any_dtype(col):
+                col = col.dt.strftime('%Y-%m-%d')
+            elif pd.api.types.is_float_dtype(col):
+                col = col.map('{:.2f}'.format, na_action='ignore')
+            elif pd.api.types.is_integer_dtype(col):
+                columns.append(col.tolist())  # Left unquoted as numbers
+                continue
+            columns.append(col.astype(object).where(col.notna(), '').tolist())
+
+        with open(str(filepath), 'w', newline='', encoding='utf-8', buffering=1 << 20) as f:  # Convert Path to string
+            writer = csv.writer(f,
+                                quoting=csv.QUOTE_NONNUMERIC,
+                                quotechar='"',
+                                doublequote=True,
+                                lineterminator=os.linesep)
+            writer.writerow(df.columns)
+            writer.writerows(zip(*columns))
     
+    def remove_stale_output(self, filepath):
+        """Delete an output left by an earlier run that this run did not rewrite"""
+        if not os.path.exists(str(filepath)):
+            return
+        try:
+            os.remove(str(filepath))
+            self.log_message(f"Removed outdated {filepath} from an earlier run")
+        except OSError as e:
+            self.log_message(f"Warning: {filepath} is from an earlier run and is out of date "
+                             f"(could not remove it: {str(e)})")
+
+    def save_parquet(self, df, filepath):
+        """Save df as Parquet; errors are only logged since the file is optional"""
+        try:
+            # Parquet keeps the typed columns for other tools and writes far faster than xlsx
+            df.to_parquet(str(filepath), compression='zstd', index=False)
+            self.log_message(f"Saved: {filepath}")
+        except Exception as e:
+            self.log_message(f"Error saving Parquet file: {str(e)}")
+
     def create_balance_validation_file(self, df, filepath):
         """Create a file that helps validate balance calculations
         
@@ -198,29 +384,20 @@ class CLIProcessor:
         """
         try:
             # Sort by account number and Global_Position (preserves NEWEST to OLDEST from PDFs)
-            df = df.sort_values(['Account_Number', 'Global_Position']).copy()
-            
-            # Group by account number and calculate within each group
-            grouped = df.groupby('Account_Number')
-            result_dfs = []
-            
-            for account, group_df in grouped:
-                # Sort by Global_Position (NEWEST to OLDEST)
-                group_df = group_df.sort_values('Global_Position').copy()
-                # Next row (shift -1) is the OLDER transaction
-                group_df['Prev_Balance'] = group_df['Balance'].shift(-1)
-                # For NEWEST to OLDEST: Balance(N) should = Prev_Balance + Paid_In - Paid_Out
-                group_df['Calc_Balance'] = group_df['Prev_Balance'] + group_df['Paid In'] - group_df['Paid out']
-                group_df['Balance_Diff'] = group_df['Balance'] - group_df['Calc_Balance']
-                group_df['Has_Discrepancy'] = abs(group_df['Balance_Diff']) > 0.01
-                result_dfs.append(group_df)
-            
-            if result_dfs:
-                final_df = pd.concat(result_dfs)
-                final_df.to_csv(str(filepath), index=False)
-                
+            df = df.sort_values(['Account_Number', 'Global_Position'])
+
+            # Next row within the same account (shift -1) is the OLDER transaction
+            df['Prev_Balance'] = df.groupby('Account_Number', sort=False, observed=True)['Balance'].shift(-1)
+            # For NEWEST to OLDEST: Balance(N) should = Prev_Balance + Paid_In - Paid_Out
+            df['Calc_Balance'] = df['Prev_Balance'] + df['Paid In'] - df['Paid out']
+            df['Balance_Diff'] = df['Balance'] - df['Calc_Balance']
+            df['Has_Discrepancy'] = df['Balance_Diff'].abs() > 0.01
+
+            if len(df):
+                df.to_csv(str(filepath), index=False)
+
                 # Report statistics
-                discrepancies = final_df['Has_Discrepancy'].sum()
+                discrepancies = df['Has_Discrepancy'].sum()
                 if discrepancies > 0:
                     self.log_message(f"Found {discrepancies} potential balance discrepancies")
                     self.log_message(f"Check {filepath} for details")
@@ -251,86 +428,118 @@ class CLIProcessor:
             pdf_files = sorted(pdf_files, key=get_sort_key, reverse=True)
             self.log_message("PDFs sorted by end date (newest first) to preserve transaction order")
 
-            all_dfs = []
             total_files = len(pdf_files)
-            global_position = 0  # Track order across all PDFs
-
-            for i, pdf_file in enumerate(pdf_files, 1):
-                self.log_message(f"Processing ({i}/{total_files}): {pdf_file.name}")
-
-                # Extract account info from PDF header
-                account_info = self.extract_account_info_from_pdf(pdf_file)
-
-                headers, table_data = self.extract_table_from_pdf(pdf_file)
-
-                if table_data:
-                    # Create DataFrame from the extracted data
-                    df = pd.DataFrame(table_data, columns=headers)
-
-                    # Basic data cleaning
-                    df = df.dropna(how='all')
-
-                    # Clean numeric values for display
-                    for col in ['Balance', 'Paid in', 'Paid out']:
-                        df[col] = df[col].replace({None: '0', '': '0', 'nan': '0'})
-                        df[col] = df[col].astype(str).str.replace('£', '').str.replace(',', '')
-                        df[col] = pd.to_numeric(df[col], errors='coerce')
-
-                    # Process dates
-                    df['Date'] = pd.to_datetime(df['Date'], format='%d %b %Y', errors='coerce')
-                    df['Description'] = df['Description'].astype(str).str.replace('\n', ' ').str.strip()
-                    df = df.dropna(subset=['Date'])
-
-                    # Add account info columns as per Thom's spec
-                    df['SortCode-AccountNumber'] = account_info['sortcode_accountnumber']
-                    df['Account Name-AccountType'] = account_info['accountname_accounttype']
-
-                    # Add source file information for tracking
-                    df['File_Path'] = str(pdf_file)
-                    df['Source_File'] = pdf_file.name
-                    df['Account_Number'] = account_info['sortcode_accountnumber']  # Keep for backwards compat
-                    # Use global position to preserve order across all PDFs (NEWEST to OLDEST)
-                    df['Global_Position'] = range(global_position, global_position + len(df))
-                    global_position += len(df)
-                    df['Original_Order'] = range(len(df))  # Keep per-file order too
-                    
-                    # Parse descriptions for DPC and POS types
-                    parsed_desc = df.apply(self.parse_description, axis=1)
-                    parsed_df = pd.DataFrame(list(parsed_desc))
-                    
-                    # Concatenate the parsed descriptions to the main dataframe
-                    df = pd.concat([df, parsed_df], axis=1)
-                    
-                    all_dfs.append(df)
-                    
-                    # Save individual file
-                    individual_csv = Path(self.output_folder) / f"{pdf_file.stem}.csv"
-                    # Keep original PDF ordering for individual files
-                    df_to_save = df.sort_values('Original_Order')
-                    self.save_dataframe(df_to_save, individual_csv)
-                    self.log_message(f"Saved: {individual_csv}")
 
+            # Each PDF is parsed independently, so fan the files out across processes.
+            # Results are collected by file and re-assembled in sorted order below.
+            results = {}
+            cpu_count = os.cpu_count() or 1
+            max_workers = min(cpu_count, total_files)
+            # Cores left over when there are fewer PDFs than CPUs go to page-level splitting
+            page_workers = max(1, cpu_count // total_files)
+
+            def completed_files():
+                if max_workers == 1:
+                    # A single worker gains nothing from a pool (one CPU or one PDF), so skip
+                    # the process start-up and pickling and run in this process
+                    for pdf_file in pdf_files:
+                        yield pdf_file, _process_one_pdf(pdf_file, self.output_folder, page_workers, self.backend, self.use_cache)
+                    return
+                with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                    futures = {executor.submit(_process_one_pdf, pdf_file, self.output_folder, page_workers,
+                                               self.backend, self.use_cache): pdf_file
+                               for pdf_file in pdf_files}
+                    for future in as_completed(futures):
+                        yield futures[future], future.result()
+
+            for i, (pdf_file, (messages, extracted)) in enumerate(completed_files(), 1):
+                self.log_message(f"Processed ({i}/{total_files}): {pdf_file.name}")
+                for message in messages:
+                    self.log_message(message)
+                results[pdf_file.name] = extracted
                 self.log_message(f"Progress: {i}/{total_files} files processed ({int(i/total_files*100)}%)")
 
-            if all_dfs:
-                combined_df = pd.concat(all_dfs, ignore_index=True)
+            # Gather the raw rows of every PDF (newest first) into one list, so the DataFrame
+            # is built and cleaned once instead of once per file followed by a concat
+            sources = []  # (pdf_file, account_info) for each PDF with table data
+            all_rows = []
+            file_ids = []  # Index into sources for every row in all_rows
+            for pdf_file in pdf_files:
+                account_info, headers, table_data = results[pdf_file.name]
+                if not table_data:
+                    continue
+                if not sources:
+                    columns = headers
+                elif headers != columns:
+                    # Line the cells up with the first PDF's columns by header name
+                    positions = [headers.index(h) if h in headers else None for h in columns]
+                    table_data = [[row[i] if i is not None else None for i in positions] for row in table_data]
+                file_ids.extend([len(sources)] * len(table_data))
+                all_rows.extend(table_data)
+                sources.append((pdf_file, account_info))
+
+            if sources:
+                combined_df = self.process_dataframe(pd.DataFrame(all_rows, columns=columns))
+
+                # process_dataframe keeps the original index, which maps each row back to its PDF
+                file_index = np.asarray(file_ids)[combined_df.index]
+                combined_df = combined_df.reset_index(drop=True)
+
+                def per_file(values):
+                    # One value per PDF, so store the distinct values once as categories
+                    return pd.Categorical(values).take(file_index)
+
+                # Add account info columns as per Thom's spec
+                combined_df['SortCode-AccountNumber'] = per_file([info['sortcode_accountnumber'] for _, info in sources])
+                combined_df['Account Name-AccountType'] = per_file([info['accountname_accounttype'] for _, info in sources])
+
+                # Add source file information for tracking
+                combined_df['File_Path'] = per_file([str(pdf_file) for pdf_file, _ in sources])
+                # File names are unique, so the row-to-file index doubles as category codes
+                combined_df['Source_File'] = pd.Categorical.from_codes(file_index, [pdf_file.name for pdf_file, _ in sources])
+                combined_df['Account_Number'] = combined_df['SortCode-AccountNumber']  # Keep for backwards compat
+                # Rows are already in newest-first PDF order, so the row number preserves order across all PDFs
+                # (int32 is ample for row counts and halves these columns' memory)
+                combined_df['Global_Position'] = np.arange(len(combined_df), dtype=np.int32)
+                combined_df['Original_Order'] = combined_df.groupby(file_index).cumcount().astype(np.int32)  # Keep per-file order too
+
+                # Parse descriptions for DPC and POS types
+                parsed_df = self.parse_descriptions(combined_df)
+
+                # Add the parsed description columns in place rather than concatenating a copy
+                combined_df[parsed_df.columns] = parsed_df
+
+                # Save individual files, keeping the original PDF ordering
+                if self.save_individual:
+                    file_rows = combined_df.groupby('Source_File', sort=False, observed=True).indices
+                    for pdf_file, _ in sources:
+                        individual_csv = Path(self.output_folder) / f"{pdf_file.stem}.csv"
+                        self.save_dataframe(combined_df.iloc[file_rows.get(pdf_file.name, [])], individual_csv)
+                        self.log_message(f"Saved: {individual_csv}")
 
                 # Rename columns to match Thom's exact spec
                 combined_df = combined_df.rename(columns={'Paid in': 'Paid In'})
 
+                # Sort by account and global position (preserves NEWEST to OLDEST order from PDFs)
+                # This is per Thom's request: preserve original line order instead of sorting by date
+                # Rows are already in Global_Position order, so a stable sort on the account alone
+                # gives the same result as sorting on both columns.
+                combined_df = combined_df.sort_values('SortCode-AccountNumber', kind='mergesort')
+
                 # Create a comprehensive duplicate detection key per Thom's spec:
                 # "Duplications are recognized because all of the above columns have duplicate values in all cells"
+                # Duplicates always share an account, so deduplicating the sorted frame still keeps
+                # the occurrence with the lowest Global_Position and needs no re-sort afterwards.
                 duplicate_cols = ['SortCode-AccountNumber', 'Account Name-AccountType', 'Date', 'Type', 'Description', 'Paid In', 'Paid out', 'Balance']
                 original_count = len(combined_df)
-                combined_df = combined_df.drop_duplicates(subset=duplicate_cols)
+                # Hash each row's key columns once and dedupe on the single integer column,
+                # rather than comparing all eight (mostly string) cells per row
+                row_hashes = pd.util.hash_pandas_object(combined_df[duplicate_cols], index=False)
+                combined_df = combined_df.loc[~row_hashes.duplicated()]
                 duplicates_removed = original_count - len(combined_df)
                 if duplicates_removed > 0:
                     self.log_message(f"Removed {duplicates_removed} duplicate transactions")
 
-                # Sort by account and global position (preserves NEWEST to OLDEST order from PDFs)
-                # This is per Thom's request: preserve original line order instead of sorting by date
-                combined_df = combined_df.sort_values(['SortCode-AccountNumber', 'Global_Position'])
-
                 # Thom's requested column order:
                 # 1. SortCode-AccountNumber
                 # 2. Account Name-AccountType
@@ -341,26 +550,40 @@ class CLIProcessor:
                 # 7. Paid out
                 # 8. Balance
                 thom_columns = ['SortCode-AccountNumber', 'Account Name-AccountType', 'Date', 'Type', 'Description', 'Paid In', 'Paid out', 'Balance']
-                thom_df = combined_df[thom_columns].copy()
+                thom_df = combined_df[thom_columns]
 
                 combined_csv = Path(self.output_folder) / "all_transactions_combined.csv"
                 combined_excel = Path(self.output_folder) / "all_transactions_combined.xlsx"
 
                 self.save_dataframe(thom_df, combined_csv)
 
-                # Create Excel with separate tabs per account (as Thom requested)
-                with pd.ExcelWriter(str(combined_excel), engine='openpyxl') as writer:
-                    # Group by SortCode-AccountNumber and create a tab for each
-                    for account_id in sorted(combined_df['SortCode-AccountNumber'].unique()):
-                        account_df = combined_df[combined_df['SortCode-AccountNumber'] == account_id].copy()
-                        # Sort by Global_Position to preserve original PDF order (NEWEST to OLDEST)
-                        account_df = account_df.sort_values('Global_Position')
-                        # Only include Thom's requested columns in Excel output
-                        account_df = account_df[thom_columns]
-                        # Use account number part for tab name (Excel limits tab names to 31 chars)
-                        tab_name = account_id.replace('-', '_')[:31]
-                        account_df.to_excel(writer, sheet_name=tab_name, index=False)
-                        self.log_message(f"Created tab '{tab_name}' with {len(account_df)} transactions")
+                if len(thom_df) > EXCEL_MAX_ROWS:
+                    self.log_message(f"Skipped Excel output: {len(thom_df)} transactions exceeds {EXCEL_MAX_ROWS}, "
+                                     f"see {combined_csv.name} instead")
+                    self.remove_stale_output(combined_excel)
+                else:
+                    # Create Excel with separate tabs per account (as Thom requested).
+                    # xlsxwriter's constant_memory mode streams each row to disk instead of
+                    # holding the whole workbook in memory, so rows are written in order below.
+                    with xlsxwriter.Workbook(str(combined_excel), {'constant_memory': True,
+                                                                   'default_date_format': 'yyyy-mm-dd hh:mm:ss'}) as workbook:
+                        header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+                        # Group by SortCode-AccountNumber and create a tab for each
+                        for account_id in sorted(combined_df['SortCode-AccountNumber'].unique()):
+                            account_df = combined_df[combined_df['SortCode-AccountNumber'] == account_id].copy()
+                            # Sort by Global_Position to preserve original PDF order (NEWEST to OLDEST)
+                            account_df = account_df.sort_values('Global_Position')
+                            # Only include Thom's requested columns in Excel output
+                            account_df = account_df[thom_columns]
+                            # Use account number part for tab name (Excel limits tab names to 31 chars)
+                            tab_name = account_id.replace('-', '_')[:31]
+                            worksheet = workbook.add_worksheet(tab_name)
+                            worksheet.write_row(0, 0, thom_columns, header_format)
+                            # Missing values become None, which xlsxwriter leaves as empty cells
+                            account_rows = account_df.astype(object).where(account_df.notna(), None)
+                            for row_number, row in enumerate(account_rows.itertuples(index=False, name=None), 1):
+                                worksheet.write_row(row_number, 0, row)
+                            self.log_message(f"Created tab '{tab_name}' with {len(account_df)} transactions")
 
                 self.log_message(f"\nProcessing Summary:")
                 self.log_message(f"Total PDFs processed: {len(pdf_files)}")
@@ -372,6 +595,13 @@ class CLIProcessor:
                 # Also save a file with balance validation information for analysis
                 self.create_balance_validation_file(combined_df, Path(self.output_folder) / "balance_validation.csv")
 
+                # Optional extra output, written last so a failure can't cost the files above
+                combined_parquet = Path(self.output_folder) / "all_transactions_combined.parquet"
+                if pyarrow is not None:
+                    self.save_parquet(thom_df, combined_parquet)
+                else:
+                    self.remove_stale_output(combined_parquet)
+
                 return True
             
         except Exception as e:
@@ -383,6 +613,82 @@ class CLIProcessor:
         return False
 
 
+def _file_digest(path):
+    """BLAKE2b (128-bit) hex digest of a file's contents, read in 1 MiB chunks.
+
+    Only used as a cache key, so a fast non-SHA hash is enough.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(str(path), 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _backend_version(backend):
+    """Version of the library behind a backend, so upgrades invalidate cached tables"""
+    if backend == 'pymupdf':
+        return pymupdf.VersionBind
+    return pdfplumber.__version__
+
+
+def _process_one_pdf(pdf_file, output_folder, page_workers=1, backend=DEFAULT_BACKEND, use_cache=True):
+    """Worker entry point for process_files' process pool.
+
+    Log lines are buffered and returned alongside the raw table so the parent can
+    replay them through its own log_message (which the GUI overrides).
+
+    Unless use_cache is False, extraction results are cached as JSON in
+    <output_folder>/.cache, keyed by the PDF's contents, the backend and its version,
+    and CACHE_VERSION, so re-running over the same statements skips parsing entirely.
+    """
+    messages = []
+    # The cache is optional: any problem with it is logged and the PDF is simply extracted
+    cache_path = None
+    if use_cache:
+        cache_dir = os.path.join(str(output_folder), '.cache')
+        try:
+            cache_path = os.path.join(cache_dir, f"{_file_digest(pdf_file)}-{backend}-"
+                                                 f"{_backend_version(backend)}-v{CACHE_VERSION}.json")
+        except OSError as e:
+            messages.append(f"Extraction cache unavailable for {pdf_file.name}: {str(e)}")
+
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path, encoding='utf-8') as f:
+                cached = json.load(f)
+            account_info, headers, table_data = cached['account_info'], cached['headers'], cached['rows']
+        except (OSError, ValueError, KeyError, TypeError):
+            # Unreadable or foreign file: fall through and extract again
+            pass
+        else:
+            messages.append(f"Loaded {len(table_data)} cached rows for {pdf_file.name}")
+            return messages, (account_info, headers, table_data)
+
+    processor = CLIProcessor(page_workers=page_workers, backend=backend)
+    processor.log_message = messages.append
+    # Extract account info from PDF header
+    account_info = processor.extract_account_info_from_pdf(pdf_file)
+    headers, table_data = processor.extract_table_from_pdf(pdf_file)
+
+    # Only cache successful extractions so failures are retried on the next run.
+    # Identical PDFs share an entry, so write to a temp file and swap it in atomically.
+    if cache_path and table_data:
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'account_info': account_info, 'headers': headers, 'rows': table_data}, f)
+            os.replace(tmp_path, cache_path)
+        except (OSError, TypeError, ValueError) as e:
+            messages.append(f"Could not write extraction cache for {pdf_file.name}: {str(e)}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+    return messages, (account_info, headers, table_data)
+
+
 class PDFProcessor(tk.Tk):
     def __init__(self):
         super().__init__()
@@ -420,6 +726,10 @@ class PDFProcessor(tk.Tk):
         self.input_folder = None
         self.output_folder = None
 
+        # Log lines from the worker thread are queued and drained on the Tk thread
+        self._log_queue = queue.Queue()
+        self._pump_logs()
+
     def configure_platform_specifics(self):
         """Configure platform-specific settings"""
         system = platform.system().lower()
@@ -456,9 +766,26 @@ class PDFProcessor(tk.Tk):
         output_entry.grid(row=1, column=1, sticky=(tk.W, tk.E), pady=5, padx=5)
         ttk.Button(parent, text="Browse", command=self.select_output_folder).grid(row=1, column=2, padx=5, pady=5)
 
+        # Processing options share one grid row, so adding an option doesn't shift the rest
+        options_frame = ttk.Frame(parent)
+        options_frame.grid(row=2, column=1, sticky=tk.W, pady=5)
+
+        # Per-file CSVs double the output written, so only produce them on request
+        self.save_individual_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="Save per-file CSVs", variable=self.save_individual_var).grid(row=0, column=0, sticky=tk.W, pady=2)
+
+        # Cached tables are copies of statement data kept in <output>/.cache
+        self.use_cache_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(options_frame, text="Cache extracted tables in the output folder", variable=self.use_cache_var).grid(row=1, column=0, sticky=tk.W, pady=2)
+
+        # PyMuPDF is opt-in, and only offered when it is installed
+        self.use_pymupdf_var = tk.BooleanVar(value=False)
+        if pymupdf is not None:
+            ttk.Checkbutton(options_frame, text="Extract tables with PyMuPDF", variable=self.use_pymupdf_var).grid(row=2, column=0, sticky=tk.W, pady=2)
+
     def create_progress_area(self, parent):
         progress_frame = ttk.LabelFrame(parent, text="Progress", padding="5")
-        progress_frame.grid(row=2, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=10)
+        progress_frame.grid(row=3, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=10)
         progress_frame.columnconfigure(0, weight=1)
 
         # Progress bar
@@ -492,10 +819,35 @@ class PDFProcessor(tk.Tk):
             self.output_path_var.set(folder)
 
     def log_message(self, message):
+        # Safe to call from any thread; the text widget is only touched by _pump_logs
         print(message)
-        self.log_text.insert(tk.END, f"[{datetime.now().strftime('%H:%M:%S')}] {message}\n")
-        self.log_text.see(tk.END)
-        self.update_idletasks()
+        self._log_queue.put(f"[{datetime.now().strftime('%H:%M:%S')}] {message}\n")
+
+    def _pump_logs(self):
+        """Move queued log lines into the log area, then reschedule in 100 ms"""
+        lines = []
+        while True:
+            try:
+                lines.append(self._log_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        if lines:
+            # One insert and one redraw per batch, however many lines arrived
+            self.log_text.insert(tk.END, ''.join(lines))
+            self.log_text.see(tk.END)
+
+            # Update progress bar from the latest processing step in the batch
+            for line in reversed(lines):
+                if "Progress:" in line:
+                    try:
+                        progress_parts = line.split("(")[1].split("%")[0]
+                        self.progress_var.set(float(progress_parts))
+                    except:
+                        pass
+                    break
+
+        self.after(100, self._pump_logs)
 
     def start_processing(self):
         if not self.input_folder or not self.output_folder:
@@ -505,35 +857,32 @@ class PDFProcessor(tk.Tk):
         self.process_btn.configure(state='disabled')
         self.progress_var.set(0)
         self.log_text.delete(1.0, tk.END)
-        
-        Thread(target=self.process_files, daemon=True).start()
 
-    def process_files(self):
+        # Tk variables may only be read on the Tk thread, so pass plain values to the worker
+        options = {
+            'save_individual': self.save_individual_var.get(),
+            'backend': 'pymupdf' if self.use_pymupdf_var.get() else 'pdfplumber',
+            'use_cache': self.use_cache_var.get(),
+        }
+        Thread(target=self.process_files, kwargs=options, daemon=True).start()
+
+    def process_files(self, save_individual=False, backend=DEFAULT_BACKEND, use_cache=True):
         # Create a CLI processor instance and delegate to it
-        cli_processor = CLIProcessor(self.input_folder, self.output_folder)
+        cli_processor = CLIProcessor(self.input_folder, self.output_folder,
+                                     save_individual=save_individual,
+                                     backend=backend,
+                                     use_cache=use_cache)
         
         # Override the log message method to also log to the GUI
-        original_log = cli_processor.log_message
-        def gui_log(message):
-            original_log(message)
-            self.log_text.insert(tk.END, f"[{datetime.now().strftime('%H:%M:%S')}] {message}\n")
-            self.log_text.see(tk.END)
-            self.update_idletasks()
-            
-            # Update progress bar for processing steps
-            if "Progress:" in message:
-                try:
-                    progress_parts = message.split("(")[1].split("%")[0]
-                    self.progress_var.set(float(progress_parts))
-                except:
-                    pass
-        
-        cli_processor.log_message = gui_log
+        cli_processor.log_message = self.log_message
         
         # Process the files
         success = cli_processor.process_files()
         
-        # Update the GUI based on the result
+        # Update the GUI based on the result (on the Tk thread)
+        self.after(0, self.finish_processing, success)
+
+    def finish_processing(self, success):
         if success:
             messagebox.showinfo("Success", "Processing completed successfully!")
         
@@ -545,18 +894,27 @@ def main():
         # Check if command-line arguments are provided
         if len(sys.argv) > 1:
             # Command-line mode
-            if len(sys.argv) != 3:
-                print("Usage: python extract.py <input_folder> <output_folder>")
+            args = sys.argv[1:]
+            use_cache = '--no-cache' not in args
+            args = [arg for arg in args if arg != '--no-cache']
+            backend = DEFAULT_BACKEND
+            if len(args) == 4 and args[2] == '--backend' and args[3] in BACKENDS:
+                backend = args[3]
+                args = args[:2]
+            if len(args) != 2:
+                print(f"Usage: python extract.py <input_folder> <output_folder> [--backend {'|'.join(BACKENDS)}] [--no-cache]")
                 input("Press Enter to exit...")
                 sys.exit(1)
-            
-            input_folder = sys.argv[1]
-            output_folder = sys.argv[2]
-            
+            if backend == 'pymupdf' and pymupdf is None:
+                print("PyMuPDF is not installed; install it with 'pip install pymupdf' or use the default backend")
+                sys.exit(1)
+
+            input_folder, output_folder = args
+
             print(f"Processing PDFs from {input_folder} to {output_folder}")
 
             # Use the CLI processor instead of GUI
-            processor = CLIProcessor(input_folder, output_folder)
+            processor = CLIProcessor(input_folder, output_folder, backend=backend, use_cache=use_cache)
             success = processor.process_files()
 
             if success:
@@ -598,4 +956,5 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
+    freeze_support()  # Needed for the process pool in PyInstaller builds
     main()
\ No newline at end of file